@@ -3,31 +3,363 @@
 LDES Harvester - Harvests Linked Data Event Streams and caches members as N-Triples
 """
 import argparse
+import asyncio
+import functools
 import hashlib
 import json
 import logging
 import os
+import random
+import sqlite3
 import sys
+import threading
 import time
-from datetime import datetime
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urljoin, urlparse
 
-import requests
-from rdflib import Graph
-from rdflib.exceptions import ParserError
+import aiohttp
+from pyld import jsonld
+
+# CPython-only speedups, the harvester also runs on PyPy without them
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library json module
+    orjson = None
+
+try:
+    from rbloom import Bloom
+except ImportError:  # Falls back to a set of processed member IDs
+    Bloom = None
+
+try:
+    import uvloop
+except ImportError:  # Optional, falls back to the default asyncio event loop
+    uvloop = None
+
+JSONLD_ACCEPT = "application/ld+json, application/json;q=0.9"
+NQUADS_LOG_SIZE = 256 * 1024 * 1024  # Start a new N-Quads log file after this many bytes
+MAX_RETRY_DELAY = 30  # Seconds between retries of a failed request, unless the server asks for more
+MAX_RETRY_AFTER = 300  # Seconds a Retry-After header is honored up to
+_RETRY_AFTER_STATUSES = (429, 503)
+
+# Alternative keys used by LDES publishers, compacted with or without "@"
+_MEMBER_KEYS = ("member", "members", "@member", "@members")
+_VIEW_KEYS = ("view", "@view")
+_RELATION_KEYS = ("relation", "@relation")
+_NODE_KEYS = ("node", "@node")
+_IMMUTABLE_KEYS = ("immutable", "ldes:immutable", "https://w3id.org/ldes#immutable")
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+RDF_LANG_STRING = "http://www.w3.org/1999/02/22-rdf-syntax-ns#langString"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+XSD_STRING = XSD + "string"
+
+# Context keywords the fast N-Triples writer knows how to handle
+_FAST_CONTEXT_KEYWORDS = {"@version"}
+_NT_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"})
+_IRI_FORBIDDEN = set('<>"{}|^`\\ ')
+
+
+def _json_loads(data: bytes):
+    """Parse JSON, with orjson when available"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _json_dumps(obj, sort_keys: bool = False) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+    return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _retry_after(headers) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (delay in seconds or HTTP date)"""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _first_value(data: Dict, keys: Tuple[str, ...]):
+    """Return the first non-empty value of the given keys"""
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return value
+    return None
+
+
+def _digest(text: str) -> str:
+    """Hex digest used for fallback member IDs and cache filenames
+
+    Digests name files in the cache, so this stays SHA-256 (hardware
+    accelerated through OpenSSL) rather than depending on optional packages.
+    """
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class _NotFlat(Exception):
+    """Raised when a JSON-LD document needs the full JSON-LD processor"""
+
+
+def _is_absolute_iri(value: str) -> bool:
+    """Check whether a string looks like an absolute IRI usable in N-Triples"""
+    scheme, sep, _ = value.partition(":")
+    return bool(sep) and scheme.isascii() and scheme[:1].isalpha() and not any(
+        c in _IRI_FORBIDDEN or ord(c) < 0x20 for c in value
+    )
+
+
+def _expand_iri(value: str, terms: Dict[str, Tuple[str, Optional[str]]], vocab: bool) -> str:
+    """Expand a term or compact IRI to an absolute IRI"""
+    if vocab and value in terms:
+        return terms[value][0]
+    prefix, sep, suffix = value.partition(":")
+    if sep and prefix in terms and not suffix.startswith("//"):
+        value = terms[prefix][0] + suffix
+    if not _is_absolute_iri(value) or value.startswith("_:"):
+        raise _NotFlat(value)
+    return value
+
+
+def _compile_context(context) -> Optional[Dict[str, Tuple[str, Optional[str]]]]:
+    """Compile an inline JSON-LD context to a term -> (IRI, type coercion) map
+
+    Returns None when the context uses features the fast writer does not
+    support (remote contexts, @vocab, @base, containers, ...).
+    """
+    if context is None:
+        return {}
+    contexts = context if isinstance(context, list) else [context]
+    raw = {}
+    for ctx in contexts:
+        if not isinstance(ctx, dict):
+            return None
+        for term, definition in ctx.items():
+            if term.startswith("@"):
+                if term not in _FAST_CONTEXT_KEYWORDS:
+                    return None
+            elif isinstance(definition, str):
+                raw[term] = (definition, None)
+            elif isinstance(definition, dict) and set(definition) <= {"@id", "@type"} \
+                    and isinstance(definition.get("@id", term), str):
+                coercion = definition.get("@type")
+                if coercion is not None and not isinstance(coercion, str):
+                    return None
+                raw[term] = (definition.get("@id", term), coercion)
+            else:
+                return None
+
+    # Resolve compact IRIs against the prefixes defined in the same context
+    terms = {}
+    try:
+        for term, (iri, coercion) in raw.items():
+            if iri not in ("@id", "@type"):
+                iri = _expand_iri(iri, raw, vocab=False)
+            if coercion not in (None, "@id"):
+                coercion = _expand_iri(coercion, raw, vocab=True)
+            terms[term] = (iri, coercion)
+    except _NotFlat:
+        return None
+    return terms
+
+
+def _nt_literal(value: str, language: str = None, datatype: str = None) -> str:
+    """Format an N-Triples literal"""
+    literal = '"' + value.translate(_NT_ESCAPES) + '"'
+    if language:
+        return f"{literal}@{language}"
+    if datatype and datatype != XSD_STRING:  # xsd:string is the default, written as a plain literal
+        return f"{literal}^^<{datatype}>"
+    return literal
+
+
+def _nt_object(value, terms: Dict[str, Tuple[str, Optional[str]]], coercion: Optional[str]) -> str:
+    """Convert a flat JSON-LD value to an N-Triples object term"""
+    if isinstance(value, dict):
+        if set(value) == {"@id"} and isinstance(value["@id"], str):
+            return f"<{_expand_iri(value['@id'], terms, vocab=False)}>"
+        if "@value" in value and set(value) <= {"@value", "@language", "@type"} \
+                and isinstance(value["@value"], str):
+            datatype = value.get("@type")
+            language = value.get("@language")
+            if datatype is not None:
+                if language is not None or not isinstance(datatype, str):
+                    raise _NotFlat(value)
+                datatype = _expand_iri(datatype, terms, vocab=True)
+            elif language is not None:
+                if not isinstance(language, str):
+                    raise _NotFlat(value)
+                language = language.lower()  # Language tags are normalized to lowercase, as pyld does
+            return _nt_literal(value["@value"], language, datatype)
+        raise _NotFlat(value)
+    if isinstance(value, bool) and coercion is None:
+        return _nt_literal("true" if value else "false", datatype=XSD + "boolean")
+    if isinstance(value, int) and coercion is None:
+        return _nt_literal(str(value), datatype=XSD + "integer")
+    if isinstance(value, str):
+        if coercion == "@id":
+            return f"<{_expand_iri(value, terms, vocab=False)}>"
+        return _nt_literal(value, datatype=coercion)
+    raise _NotFlat(value)
+
+
+def _fast_jsonld_to_nt(doc: Dict, context: Dict[str, Tuple[str, Optional[str]]]) -> Optional[bytes]:
+    """Convert a flat JSON-LD node to N-Triples without the JSON-LD processor
+
+    Only handles a single node with an IRI @id whose properties are literals
+    or IRI references. Returns None if the document needs the full parser.
+    """
+    if not isinstance(doc, dict) or context is None:
+        return None
+    try:
+        subject = None
+        triples = []
+        for key, value in doc.items():
+            if key == "@context":
+                continue
+            term = context.get(key)
+            keyword = term[0] if term and term[0] in ("@id", "@type") else key
+            if keyword == "@id":
+                if not isinstance(value, str):
+                    return None
+                subject = f"<{_expand_iri(value, context, vocab=False)}>"
+            elif keyword == "@type":
+                for type_value in value if isinstance(value, list) else [value]:
+                    if not isinstance(type_value, str):
+                        return None
+                    triples.append((f"<{RDF_TYPE}>", f"<{_expand_iri(type_value, context, vocab=True)}>"))
+            elif key.startswith("@"):
+                return None
+            elif term is not None or ":" in key:
+                predicate = f"<{term[0] if term else _expand_iri(key, context, vocab=False)}>"
+                coercion = term[1] if term else None
+                for item in value if isinstance(value, list) else [value]:
+                    if isinstance(item, list):
+                        return None
+                    if item is not None:
+                        triples.append((predicate, _nt_object(item, context, coercion)))
+            # Terms without a mapping are dropped, as the JSON-LD expansion does
+        if subject is None:
+            return None
+    except _NotFlat:
+        return None
+
+    lines = dict.fromkeys(f"{subject} {predicate} {obj} .\n" for predicate, obj in triples)
+    return "".join(lines).encode("utf-8")
+
+
+def _graph_name(object_id: str, terms: Optional[Dict[str, Tuple[str, Optional[str]]]]) -> str:
+    """Named graph IRI of an object: its ID expanded like the subject, or a hash of the ID"""
+    _, sep, suffix = object_id.partition(":")
+    if sep and suffix.startswith("//") and _is_absolute_iri(object_id):
+        return object_id  # Never a compact IRI
+    if terms is not None:
+        try:
+            return _expand_iri(object_id, terms, vocab=False)
+        except _NotFlat:
+            pass
+    return "urn:sha256:" + _digest(object_id)
+
+
+def _nt_to_nq(nt_data: bytes, graph: str) -> bytes:
+    """Turn N-Triples into N-Quads in the given named graph"""
+    suffix = f" <{graph}> .\n".encode("utf-8")
+    return b"".join(line.rstrip()[:-1].rstrip() + suffix for line in nt_data.splitlines() if line.strip())
+
+
+class MemberParseError(Exception):
+    """Raised when a member is not valid JSON-LD"""
+
+
+@functools.lru_cache(maxsize=256)
+def _load_document(url: str) -> Dict:
+    """Load a remote JSON-LD document (context), once per worker process"""
+    return jsonld.requests_document_loader(timeout=30)(url, {})
+
+
+def _document_loader(url: str, options: Dict = None) -> Dict:
+    """Caching pyld document loader"""
+    return _load_document(url)
+
+
+def _nt_term(term: Dict, blank_nodes: Dict[str, str]) -> str:
+    """Format a pyld RDF term as N-Triples term"""
+    if term["type"] == "IRI":
+        return f"<{term['value']}>"
+    if term["type"] == "blank node":
+        # pyld numbers blank nodes per document, make them unique across members
+        if term["value"] not in blank_nodes:
+            blank_nodes[term["value"]] = "_:N" + uuid.uuid4().hex
+        return blank_nodes[term["value"]]
+    datatype = term.get("datatype")
+    if datatype == RDF_LANG_STRING:
+        return _nt_literal(term["value"], language=term.get("language"))
+    return _nt_literal(term["value"], datatype=datatype)
+
+
+def _member_to_nt(jsonld_data: bytes) -> bytes:
+    """Convert a JSON-LD document to N-Triples with pyld
+
+    Module-level so it can run in a worker process.
+    """
+    try:
+        dataset = jsonld.to_rdf(_json_loads(jsonld_data), {"documentLoader": _document_loader})
+    except jsonld.JsonLdError as e:
+        # Not every pyld error survives pickling back to the harvester process
+        raise MemberParseError(str(e)) from None
+
+    blank_nodes = {}
+    lines = dict.fromkeys(
+        f"{_nt_term(t['subject'], blank_nodes)} {_nt_term(t['predicate'], blank_nodes)} {_nt_term(t['object'], blank_nodes)} .\n"
+        for t in dataset.get("@default", [])
+    )
+    return "".join(lines).encode("utf-8")
 
 
 class LDESHarvester:
     """Harvests LDES endpoints and caches members as N-Triples files"""
 
-    def __init__(self, cache_dir: str = "./cache", resume: bool = True):
+    def __init__(self, cache_dir: str = "./cache", resume: bool = True, concurrency: int = 32, workers: int = None,
+                 write_workers: int = 4, expected_members: int = 1_000_000, nquads: bool = False):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
         self.state_file = self.cache_dir / "state.json"
+        self.members_log_file = self.cache_dir / "members.log"
+
+        # Optional N-Quads output: members are appended to rolling log files
+        # and their position is kept in an SQLite index
+        self.nquads = nquads
+        self._log_lock = threading.Lock()
+        if self.nquads:
+            self._open_nquads_log()
         self.resume = resume
 
+        # Concurrency: maximum number of pages fetched at the same time (fetch workers)
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+        # Worker processes for the CPU-bound JSON-LD conversion, started by harvest(),
+        # and as many parse workers feeding them
+        self.workers = workers or os.cpu_count()
+        self._pool: ProcessPoolExecutor = None
+
+        # Workers saving the members of converted pages, and the objects they are saving
+        self.write_workers = write_workers
+        self._saving: Set[str] = set()
+
         # Statistics
         self.stats = {
             "start_time": datetime.now().isoformat(),
@@ -39,8 +371,25 @@ class LDESHarvester:
 
         # State management
         self.processed_pages: Set[str] = set()
-        self.processed_members: Set[str] = set()
-        self.pending_pages: List[str] = []  # Queue of pages to process
+        # Bloom filter of saved object IDs, a hit is confirmed against the cache
+        self.expected_members = expected_members
+        self.processed_members = self._new_processed_members()
+        # Append-only log of saved object IDs, the Bloom filter is rebuilt from it on resume
+        self._members_log = open(self.members_log_file, "ab" if resume else "wb", buffering=1 << 20)
+        # Queued, in-flight and failed pages in queue order, with the context inherited from the linking page
+        self.pending_pages: Dict[str, Optional[Dict]] = {}
+        self._fetch_queue: asyncio.Queue = asyncio.Queue()  # Pages to fetch
+        self._visited: Set[str] = set()  # Pages queued or followed in this run, each is visited once
+
+        # Per page HTTP validators and next pages, to revalidate processed pages cheaply
+        self.page_etags: Dict[str, str] = {}
+        self.page_last_modified: Dict[str, str] = {}
+        self.page_next_urls: Dict[str, List[str]] = {}
+        self.immutable_pages: Set[str] = set()  # Never revalidated, their next pages are known
+
+        # JSON-LD context caches, shared by all members of a harvest
+        self._remote_contexts: Dict[str, asyncio.Future] = {}
+        self._context_cache: Dict[bytes, Optional[Dict]] = {}
 
         # Setup logging
         self._setup_logging()
@@ -49,6 +398,31 @@ class LDESHarvester:
         if self.resume:
             self._load_state()
 
+    def _open_nquads_log(self):
+        """Open the N-Quads member index and the last log file for appending"""
+        self._index = sqlite3.connect(str(self.cache_dir / "index.sqlite"), check_same_thread=False)
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS members ("
+            "object_id TEXT PRIMARY KEY, log_file TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL)"
+        )
+        logs = sorted(self.cache_dir.glob("harvest-*.nq"))
+        self._log_number = int(logs[-1].stem.split("-")[1]) if logs else 0
+        self._log_path = self.cache_dir / f"harvest-{self._log_number:05d}.nq"
+        self._log = open(self._log_path, "ab", buffering=1 << 20)
+
+    def _new_processed_members(self):
+        """Bloom filter of processed member IDs, or a set when rbloom is not installed"""
+        return Bloom(self.expected_members, 0.001) if Bloom is not None else set()
+
+    def close(self):
+        """Close the members log, and the N-Quads log and index"""
+        self._members_log.close()
+        if self.nquads:
+            with self._log_lock:
+                self._log.close()
+                self._index.commit()
+                self._index.close()
+
     def _setup_logging(self):
         """Configure logging to console and file"""
         log_format = "%(asctime)s - %(levelname)s - %(message)s"
@@ -66,48 +440,143 @@ class LDESHarvester:
         """Load previous harvesting state for resume capability"""
         if self.state_file.exists():
             try:
-                with open(self.state_file, 'r') as f:
-                    state = json.load(f)
+                with open(self.state_file, 'rb') as f:
+                    state = _json_loads(f.read())
                     self.processed_pages = set(state.get("processed_pages", []))
-                    self.processed_members = set(state.get("processed_members", []))
-                    self.pending_pages = state.get("pending_pages", [])
+                    if self.members_log_file.exists():
+                        with open(self.members_log_file, "rb") as log:
+                            self.processed_members.update(line.rstrip(b"\n").decode("utf-8") for line in log)
+                    # State files of older versions list the processed members
+                    self.processed_members.update(state.get("processed_members", []))
+                    self.pending_pages = dict.fromkeys(state.get("pending_pages", []))
+                    for url in self.pending_pages:
+                        self._fetch_queue.put_nowait(url)
+                    self._visited.update(self.pending_pages)
+                    self.page_etags = state.get("page_etags", {})
+                    self.page_last_modified = state.get("page_last_modified", {})
+                    self.page_next_urls = state.get("page_next_urls", {})
+                    self.immutable_pages = set(state.get("immutable_pages", []))
                     self.stats = state.get("stats", self.stats)
-                    self.logger.info(f"Resumed from previous state: {len(self.processed_members)} members, {len(self.processed_pages)} pages, {len(self.pending_pages)} pending")
+                    self.logger.info(f"Resumed from previous state: {self.stats['members_harvested']} members, {len(self.processed_pages)} pages, {len(self.pending_pages)} pending")
             except Exception as e:
                 self.logger.error(f"Failed to load state: {e}")
                 self.processed_pages = set()
-                self.processed_members = set()
-                self.pending_pages = []
+                self.processed_members = self._new_processed_members()
+                self.pending_pages = {}
+                self._fetch_queue = asyncio.Queue()
 
     def _save_state(self):
         """Save current harvesting state"""
         try:
             state = {
                 "processed_pages": list(self.processed_pages),
-                "processed_members": list(self.processed_members),
-                "pending_pages": self.pending_pages,
+                "pending_pages": list(self.pending_pages),
+                "page_etags": self.page_etags,
+                "page_last_modified": self.page_last_modified,
+                "page_next_urls": self.page_next_urls,
+                "immutable_pages": list(self.immutable_pages),
                 "stats": self.stats,
                 "last_updated": datetime.now().isoformat()
             }
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=2)
+            # Write compact JSON to a temporary file and swap it in atomically,
+            # so an interrupted save never leaves a truncated state file behind
+            tmp_file = self.state_file.with_suffix(".json.tmp")
+            tmp_file.write_bytes(_json_dumps(state))
+            if self.nquads:
+                # Members in the log must be on disk before they are marked processed
+                with self._log_lock:
+                    self._log.flush()
+                    self._index.commit()
+            # Only the members saved since the last checkpoint are written out
+            self._members_log.flush()
+            os.replace(tmp_file, self.state_file)
         except Exception as e:
             self.logger.error(f"Failed to save state: {e}")
 
-    def _fetch_url(self, url: str, retry: int = 3) -> Dict:
-        """Fetch URL with retry logic"""
+    async def _fetch_url(self, session: aiohttp.ClientSession, url: str, retry: int = 3, conditional: bool = False) -> Optional[Dict]:
+        """Fetch URL with retry logic
+
+        With `conditional`, validators of the response are recorded and those of
+        an earlier response of a processed page are sent along; None is returned
+        when the server answers 304 Not Modified.
+        """
+        headers = {}
+        if conditional and url in self.page_next_urls:
+            if url in self.page_etags:
+                headers["If-None-Match"] = self.page_etags[url]
+            if url in self.page_last_modified:
+                headers["If-Modified-Since"] = self.page_last_modified[url]
+
         for attempt in range(retry):
             try:
-                self.logger.info(f"Fetching: {url}")
-                response = requests.get(url, timeout=30)
-                response.raise_for_status()
-                return response.json()
-            except requests.RequestException as e:
+                async with self._semaphore:
+                    self.logger.info(f"Fetching: {url}")
+                    async with session.get(url, headers=headers) as response:
+                        if response.status == 304 and headers:
+                            return None
+                        response.raise_for_status()
+                        data = _json_loads(await response.read())
+                        if conditional:
+                            if "immutable" in response.headers.get("Cache-Control", ""):
+                                self.immutable_pages.add(url)
+                            if "ETag" in response.headers:
+                                self.page_etags[url] = response.headers["ETag"]
+                            if "Last-Modified" in response.headers:
+                                self.page_last_modified[url] = response.headers["Last-Modified"]
+                        return data
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
                 self.logger.warning(f"Attempt {attempt + 1}/{retry} failed for {url}: {e}")
                 if attempt == retry - 1:
                     self.stats["errors"] += 1
                     raise
-                time.sleep(2 ** attempt)  # Exponential backoff
+                # Exponential backoff with jitter, so concurrent fetches don't retry in lockstep,
+                # or as long as a rate limiting or unavailable server asks
+                delay = min(MAX_RETRY_DELAY, 2 ** attempt + random.uniform(0, 1))
+                if isinstance(e, aiohttp.ClientResponseError) and e.status in _RETRY_AFTER_STATUSES:
+                    retry_after = _retry_after(e.headers)
+                    if retry_after is not None:
+                        delay = min(MAX_RETRY_AFTER, max(delay, retry_after))
+                await asyncio.sleep(delay)
+
+    async def _fetch_context(self, session: aiohttp.ClientSession, url: str):
+        """Fetch a remote JSON-LD context document and return its (resolved) context
+
+        Tried once: if it fails, the context is left to the JSON-LD processor,
+        which loads it itself.
+        """
+        try:
+            async with self._semaphore:
+                self.logger.info(f"Fetching context: {url}")
+                async with session.get(url, headers={"Accept": JSONLD_ACCEPT}) as response:
+                    response.raise_for_status()
+                    data = _json_loads(await response.read())
+            return await self._resolve_context(session, data.get("@context"), url)
+        except Exception as e:
+            self.logger.warning(f"Failed to fetch context {url}, leaving it to the JSON-LD parser: {e}")
+            return None
+
+    async def _resolve_context(self, session: aiohttp.ClientSession, context, base_url: str = None):
+        """Inline remote JSON-LD contexts, fetching each context document only once"""
+        if isinstance(context, str):
+            url = urljoin(base_url, context) if base_url else context
+            if url not in self._remote_contexts:
+                self._remote_contexts[url] = asyncio.ensure_future(self._fetch_context(session, url))
+            resolved = await self._remote_contexts[url]
+            return context if resolved is None else resolved
+        if isinstance(context, list):
+            resolved = []
+            for ctx in context:
+                ctx = await self._resolve_context(session, ctx, base_url)
+                resolved.extend(ctx if isinstance(ctx, list) else [ctx])
+            return resolved
+        return context
+
+    def _get_compiled_context(self, context) -> Optional[Dict]:
+        """Compile a JSON-LD context for the fast N-Triples writer, once per distinct context"""
+        key = _json_dumps(context, sort_keys=True)
+        if key not in self._context_cache:
+            self._context_cache[key] = _compile_context(context)
+        return self._context_cache[key]
 
     def _get_member_id(self, member: Dict) -> str:
         """Extract member ID from member object"""
@@ -120,11 +589,22 @@ class LDESHarvester:
                 elif isinstance(value, dict) and "@id" in value:
                     return value["@id"]
 
-        # Fallback: use hash of entire member
-        return hashlib.sha256(json.dumps(member, sort_keys=True).encode()).hexdigest()
+        # Fallback: use hash of entire member (stdlib JSON, keeps the digests stable)
+        return _digest(json.dumps(member, sort_keys=True))
+
+    def _get_object_id(self, member: Dict, member_id: str) -> str:
+        """Extract the ID of the object a member describes, which names its cache file"""
+        # Use @graph id if available
+        graph_data = member.get("@graph")
+        if graph_data and isinstance(graph_data, dict):
+            return graph_data.get("id") or graph_data.get("@id") or member_id
+        return member_id
+
+    async def _convert_member(self, member: Dict, member_id: str, context: Dict = None, compiled_context: Dict = None) -> Optional[Tuple[str, bytes]]:
+        """Convert member to N-Triples, returning the object ID and the N-Triples data
 
-    def _save_member_as_ntriples(self, member: Dict, context: Dict = None):
-        """Convert member to N-Triples and save to cache"""
+        `compiled_context` is `context` compiled for the fast writer, None if it can't be.
+        """
         try:
             # Extract the actual object data from @graph if present
             # Otherwise use the full member (for non-ActivityStreams LDES)
@@ -136,211 +616,360 @@ class LDESHarvester:
                 if "@context" not in jsonld_doc:
                     jsonld_doc = {"@context": context or member.get("@context"), **graph_data}
             else:
-                # Fallback: use entire member
-                jsonld_doc = member.copy()
-                if context and "@context" not in jsonld_doc:
-                    jsonld_doc["@context"] = context
-
-            # Parse as RDF graph
-            g = Graph()
-            g.parse(data=json.dumps(jsonld_doc), format="json-ld")
-
-            # Generate filename from member ID (use @graph id if available)
-            if graph_data and isinstance(graph_data, dict):
-                object_id = graph_data.get("id") or graph_data.get("@id") or self._get_member_id(member)
-            else:
-                object_id = self._get_member_id(member)
-
-            filename = hashlib.sha256(object_id.encode()).hexdigest() + ".nt"
-            filepath = self.cache_dir / filename
+                # Fallback: use entire member, only copied when it needs the page context
+                jsonld_doc = member
+                if context and "@context" not in member:
+                    jsonld_doc = {"@context": context, **member}
 
-            # Serialize to N-Triples with UTF-8 encoding
-            g.serialize(destination=str(filepath), format="nt", encoding="utf-8")
+            # Object ID used for the filename
+            object_id = self._get_object_id(member, member_id)
 
-            self.processed_members.add(object_id)
-            self.stats["members_harvested"] += 1
-            self.logger.debug(f"Saved object {object_id} to {filename}")
+            # Flat members are converted directly, anything else goes through
+            # the JSON-LD processor in a worker process to use all cores
+            doc_context = jsonld_doc.get("@context")
+            if doc_context is not context:
+                compiled_context = self._get_compiled_context(doc_context)
+            nt_data = _fast_jsonld_to_nt(jsonld_doc, compiled_context)
+            if nt_data is None:
+                loop = asyncio.get_running_loop()
+                nt_data = await loop.run_in_executor(self._pool, _member_to_nt, _json_dumps(jsonld_doc))
+            return object_id, nt_data
 
-        except ParserError as e:
+        except MemberParseError as e:
             self.logger.error(f"Failed to parse member as JSON-LD: {e}")
             self.stats["errors"] += 1
         except Exception as e:
-            self.logger.error(f"Failed to save member: {e}")
+            self.logger.error(f"Failed to convert member: {e}")
             self.stats["errors"] += 1
+        return None
+
+    def _member_path(self, object_id: str) -> Path:
+        """Cache file of an object, sharded in two directory levels to keep directories small"""
+        filename = _digest(object_id) + ".nt"
+        return self.cache_dir / filename[:2] / filename[2:4] / filename
+
+    async def _processed_objects(self, object_ids: List[str]) -> Set[str]:
+        """Return the objects that were already saved"""
+        # The Bloom filter has no false negatives, confirm its (rare false) positives
+        # on disk in a worker thread, so the event loop never waits for the disk
+        hits = [object_id for object_id in object_ids if object_id in self.processed_members]
+        if not hits:
+            return set()
+        return await asyncio.to_thread(self._confirm_processed, hits)
+
+    def _confirm_processed(self, object_ids: List[str]) -> Set[str]:
+        """Check which of the objects were saved, in the N-Quads index or the cache directory"""
+        if self.nquads:
+            with self._log_lock:
+                return {
+                    object_id for object_id in object_ids
+                    if self._index.execute("SELECT 1 FROM members WHERE object_id = ?", (object_id,)).fetchone()
+                }
+        return {object_id for object_id in object_ids if self._member_path(object_id).exists()}
+
+    @staticmethod
+    def _write_files(files: List[Tuple[Path, bytes]]) -> List[Optional[Exception]]:
+        """Write files in order, returning the error (or None) for each file"""
+        errors = []
+        for filepath, data in files:
+            try:
+                filepath.parent.mkdir(parents=True, exist_ok=True)
+                filepath.write_bytes(data)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    def _append_nquads(self, members: List[Tuple[str, bytes]], compiled_context: Dict = None) -> List[Optional[Exception]]:
+        """Append members to the N-Quads log in order, returning the error (or None) for each member"""
+        errors = []
+        with self._log_lock:
+            for object_id, nt_data in members:
+                try:
+                    if self._log.tell() >= NQUADS_LOG_SIZE:
+                        self._log.close()
+                        self._log_number += 1
+                        self._log_path = self.cache_dir / f"harvest-{self._log_number:05d}.nq"
+                        self._log = open(self._log_path, "ab", buffering=1 << 20)
+                    data = _nt_to_nq(nt_data, _graph_name(object_id, compiled_context))
+                    offset = self._log.tell()
+                    self._log.write(data)
+                    self._index.execute(
+                        "INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?)",
+                        (object_id, self._log_path.name, offset, len(data))
+                    )
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(e)
+        return errors
+
+    async def _save_members(self, members: List[Tuple[str, bytes]], compiled_context: Dict = None):
+        """Save N-Triples data of members to cache"""
+        # Write the members of a page in a worker thread, so the event loop
+        # keeps fetching other pages while the disk is busy
+        if self.nquads:
+            errors = await asyncio.to_thread(self._append_nquads, members, compiled_context)
+        else:
+            files = [(self._member_path(object_id), nt_data) for object_id, nt_data in members]
+            errors = await asyncio.to_thread(self._write_files, files)
+
+        for (object_id, _), error in zip(members, errors):
+            if error is None:
+                self.processed_members.add(object_id)
+                self._members_log.write(object_id.encode("utf-8") + b"\n")
+                self.stats["members_harvested"] += 1
+                self.logger.debug(f"Saved object {object_id}")
+            else:
+                self.logger.error(f"Failed to save member: {error}")
+                self.stats["errors"] += 1
 
     def _extract_relations(self, data: Dict) -> List[str]:
-        """Extract next page URLs from LDES relations"""
-        relations = []
-
-        # Check for view relations
-        view = data.get("view") or data.get("@view")
-        if view:
-            if isinstance(view, dict):
-                # Direct relation in view
-                relation = view.get("relation") or view.get("@relation")
-                if relation:
-                    relations.extend(self._extract_node_urls(relation))
-            elif isinstance(view, list):
-                # Multiple views
-                for v in view:
-                    relation = v.get("relation") or v.get("@relation")
-                    if relation:
-                        relations.extend(self._extract_node_urls(relation))
-
-        # Check for direct relations at root level
-        relation = data.get("relation") or data.get("@relation")
-        if relation:
-            relations.extend(self._extract_node_urls(relation))
-
-        return relations
-
-    def _extract_node_urls(self, relation) -> List[str]:
-        """Extract node URLs from relation objects"""
-        urls = []
-
-        if isinstance(relation, dict):
-            node = relation.get("node") or relation.get("@node")
-            if node:
-                if isinstance(node, dict):
-                    url = node.get("@id") or node.get("id")
-                    if url:
-                        urls.append(url)
-                elif isinstance(node, str):
-                    urls.append(node)
-        elif isinstance(relation, list):
-            for rel in relation:
-                urls.extend(self._extract_node_urls(rel))
+        """Extract next page URLs from LDES relations, without duplicates"""
+        return list(dict.fromkeys(self._iter_node_urls(data)))
 
-        return urls
+    def _iter_node_urls(self, data: Dict) -> Iterator[str]:
+        """Yield node URLs of the relations in the views and at root level"""
+        view = _first_value(data, _VIEW_KEYS)
+        views = view if isinstance(view, list) else [view] if view else []
+
+        for container in (*views, data):
+            if not isinstance(container, dict):
+                continue
+            relation = _first_value(container, _RELATION_KEYS)
+            for rel in relation if isinstance(relation, list) else [relation]:
+                if not isinstance(rel, dict):
+                    continue
+                node = _first_value(rel, _NODE_KEYS)
+                if isinstance(node, dict):
+                    node = node.get("@id") or node.get("id")
+                if node and isinstance(node, str):
+                    yield node
 
     def _extract_members(self, data: Dict) -> List[Dict]:
         """Extract members from LDES page"""
         members = []
 
         # Try different possible member fields
-        for member_field in ["member", "members", "@member", "@members"]:
-            if member_field in data:
-                member_data = data[member_field]
-                if isinstance(member_data, list):
-                    members.extend(member_data)
-                elif isinstance(member_data, dict):
-                    members.append(member_data)
+        for member_field in _MEMBER_KEYS:
+            member_data = data.get(member_field)
+            if isinstance(member_data, list):
+                members.extend(member_data)
+            elif isinstance(member_data, dict):
+                members.append(member_data)
 
         return members
 
-    def _process_page(self, url: str, context: Dict = None):
-        """Process a single LDES page"""
-        if url in self.processed_pages:
-            self.logger.debug(f"Already processed page: {url}, checking for unprocessed next pages")
-            # Still need to check for next pages that might not be processed yet
+    def _enqueue(self, url: str, context: Dict = None) -> bool:
+        """Add a page to the pending queue, unless it is already pending or was visited in this run
+
+        Pages processed in an earlier run are queued as well, they are revalidated
+        with a conditional request to find the pages they link to since. Immutable
+        pages are never fetched again, the next pages stored for them are followed.
+        """
+        queued = False
+        urls = [url]
+        while urls:
+            url = urls.pop()
+            if url in self.pending_pages or url in self._visited:
+                continue
+            self._visited.add(url)
+            if url in self.immutable_pages and url in self.page_next_urls:
+                self.logger.debug(f"Skipping immutable page: {url}")
+                urls.extend(reversed(self.page_next_urls[url]))
+                continue
+            self.pending_pages[url] = context
+            self._fetch_queue.put_nowait(url)
+            queued = True
+        return queued
+
+    async def _fetch_worker(self, session: aiohttp.ClientSession, parse_queue: asyncio.Queue):
+        """Fetch queued pages and hand their new members to the parse workers"""
+        while (url := await self._fetch_queue.get()) is not None:
+            # Drop stale queue entries
+            if url not in self.pending_pages:
+                self.logger.debug(f"Skipping already processed page: {url}")
+                self._fetch_queue.task_done()
+                continue
+            context = self.pending_pages[url]
             try:
-                data = self._fetch_url(url)
+                # Revalidate pages processed before with a conditional request
+                data = await self._fetch_url(session, url, conditional=True)
+                if data is None:
+                    self.logger.info(f"Not modified since processed: {url}")
+                    del self.pending_pages[url]
+                    for next_url in self.page_next_urls[url]:
+                        self._enqueue(next_url, context)
+                    self._fetch_queue.task_done()
+                    continue
+
+                # Extract context if present. Remote contexts are inlined for the fast
+                # N-Triples writer only, the JSON-LD processor loads (and caches) them
+                # itself, so members sent to the worker processes stay small
                 page_context = data.get("@context", context)
-                next_urls = self._extract_relations(data)
-                for next_url in next_urls:
-                    if next_url not in self.processed_pages and next_url not in self.pending_pages:
-                        self.pending_pages.append(next_url)
-                        self._process_page(next_url, page_context)
-            except Exception as e:
-                self.logger.error(f"Failed to extract next pages from {url}: {e}")
-            return
+                compiled_context = self._get_compiled_context(await self._resolve_context(session, page_context))
 
-        try:
-            # Add to pending queue
-            if url not in self.pending_pages:
-                self.pending_pages.append(url)
+                # Extract members
+                members = self._extract_members(data)
+                self.logger.info(f"Found {len(members)} members on page: {url}")
+                keyed = []
+                for member in members:
+                    member_id = self._get_member_id(member)
+                    keyed.append((member, member_id, self._get_object_id(member, member_id)))
+                processed = await self._processed_objects([object_id for _, _, object_id in keyed])
+                new_members = [(member, member_id) for member, member_id, object_id in keyed if object_id not in processed]
+                await parse_queue.put((url, data, page_context, compiled_context, new_members))
+            except Exception as e:
+                self.logger.error(f"Failed to process page {url}: {e}")
+                self.stats["errors"] += 1
+                self._fetch_queue.task_done()
+        self._fetch_queue.task_done()  # The stop sentinel
 
-            data = self._fetch_url(url)
+    async def _parse_worker(self, parse_queue: asyncio.Queue, write_queue: asyncio.Queue):
+        """Convert the new members of fetched pages to N-Triples"""
+        while (page := await parse_queue.get()) is not None:
+            url, data, page_context, compiled_context, new_members = page
+            try:
+                # Convert the members of a page in parallel, they are saved in page order
+                results = await asyncio.gather(
+                    *[self._convert_member(member, member_id, page_context, compiled_context) for member, member_id in new_members]
+                )
+                await write_queue.put((url, data, page_context, compiled_context, results))
+            except Exception as e:
+                self.logger.error(f"Failed to process page {url}: {e}")
+                self.stats["errors"] += 1
+                self._fetch_queue.task_done()
 
-            # Extract and save context if present
-            page_context = data.get("@context", context)
+    async def _write_worker(self, write_queue: asyncio.Queue):
+        """Save the members of converted pages and queue their next pages"""
+        while (page := await write_queue.get()) is not None:
+            url, data, page_context, compiled_context, results = page
+            try:
+                # The last version of an object on the page wins
+                to_save = {result[0]: result for result in results if result is not None and result[0] not in self._saving}
+                # Claim the objects before waiting for the disk, so write workers
+                # saving other pages skip them instead of saving them again
+                self._saving.update(to_save)
+                try:
+                    processed = await self._processed_objects(list(to_save))
+                    await self._save_members([result for object_id, result in to_save.items() if object_id not in processed], compiled_context)
+                finally:
+                    self._saving.difference_update(to_save)
 
-            # Extract and save members
-            members = self._extract_members(data)
-            self.logger.info(f"Found {len(members)} members on page: {url}")
+                # Mark page as processed and remove from pending
+                if _first_value(data, _IMMUTABLE_KEYS) is True:
+                    self.immutable_pages.add(url)
+                next_urls = self._extract_relations(data)
+                self.page_next_urls[url] = next_urls
+                self.processed_pages.add(url)
+                del self.pending_pages[url]
+                self.stats["pages_processed"] += 1
 
-            for member in members:
-                member_id = self._get_member_id(member)
-                if member_id not in self.processed_members:
-                    self._save_member_as_ntriples(member, page_context)
+                # Queue next pages, before a checkpoint can mark this page processed
+                for next_url in next_urls:
+                    self._enqueue(next_url, page_context)
 
-            # Mark page as processed and remove from pending
-            self.processed_pages.add(url)
-            if url in self.pending_pages:
-                self.pending_pages.remove(url)
-            self.stats["pages_processed"] += 1
+                # Save state periodically
+                if self.stats["pages_processed"] % 10 == 0:
+                    self._save_state()
+            except Exception as e:
+                self.logger.error(f"Failed to process page {url}: {e}")
+                self.stats["errors"] += 1
+            finally:
+                self._fetch_queue.task_done()
 
-            # Save state periodically
-            if self.stats["pages_processed"] % 10 == 0:
-                self._save_state()
+    async def _crawl(self, session: aiohttp.ClientSession):
+        """Process pending pages in a pipeline of fetch, parse and write workers
 
-            # Extract and process next pages
-            next_urls = self._extract_relations(data)
-            for next_url in next_urls:
-                if next_url not in self.processed_pages and next_url not in self.pending_pages:
-                    self._process_page(next_url, page_context)
+        The stages are connected by bounded queues, so the network, the CPU and
+        the disk are kept busy at the same time. A page is done when it is
+        saved (or failed), after its next pages were queued; pages processed in
+        an earlier run are revalidated with a conditional request.
+        """
+        parse_queue = asyncio.Queue(maxsize=self.concurrency)
+        write_queue = asyncio.Queue(maxsize=self.concurrency)
+        stages = [
+            (self._fetch_queue, [self._fetch_worker(session, parse_queue) for _ in range(self.concurrency)]),
+            (parse_queue, [self._parse_worker(parse_queue, write_queue) for _ in range(self.workers)]),
+            (write_queue, [self._write_worker(write_queue) for _ in range(self.write_workers)]),
+        ]
+        tasks = [[asyncio.create_task(worker) for worker in workers] for _, workers in stages]
+        try:
+            await self._fetch_queue.join()
+        except BaseException:
+            for stage_tasks in tasks:
+                for task in stage_tasks:
+                    task.cancel()
+            raise
 
-        except Exception as e:
-            self.logger.error(f"Failed to process page {url}: {e}")
-            self.stats["errors"] += 1
+        # All pages are done, stop the workers stage by stage
+        for (queue, _), stage_tasks in zip(stages, tasks):
+            for _ in stage_tasks:
+                await queue.put(None)
+            await asyncio.gather(*stage_tasks)
 
-    def harvest(self, ldes_url: str):
+    async def harvest(self, ldes_url: str):
         """Main harvesting method"""
         self.logger.info(f"Starting LDES harvest from: {ldes_url}")
         start_time = time.time()
 
-        try:
-            # First, process any pending pages from previous interrupted run
-            if self.pending_pages:
-                self.logger.info(f"Resuming with {len(self.pending_pages)} pending pages")
-                # Make a copy since we'll modify the list during processing
-                pending_copy = self.pending_pages.copy()
-                for pending_url in pending_copy:
-                    if pending_url not in self.processed_pages:
-                        self.logger.info(f"Resuming from pending page: {pending_url}")
-                        self._process_page(pending_url, None)
-
-                # If we processed all pending pages successfully, we're done
-                if not self.pending_pages:
-                    self.logger.info("All pending pages processed, harvest complete")
-                    self._save_state()
-                    self.stats["total_duration"] = time.time() - start_time
-                    self.stats["end_time"] = datetime.now().isoformat()
-                    self._print_summary()
-                    return
+        # One session for the whole harvest: LDES pages are nearly always served
+        # by the same host, so pooled keep-alive connections skip the TCP and
+        # TLS handshakes on every fetch
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency, keepalive_timeout=75)
+        timeout = aiohttp.ClientTimeout(total=30, connect=5)
+        with ProcessPoolExecutor(max_workers=self.workers) as self._pool:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                try:
+                    # First, process any pending pages from previous interrupted run
+                    if self.pending_pages:
+                        self.logger.info(f"Resuming with {len(self.pending_pages)} pending pages")
+                        for pending_url in self.pending_pages:
+                            self.logger.info(f"Resuming from pending page: {pending_url}")
+                        await self._crawl(session)
 
-            # Fetch the collection entry point
-            data = self._fetch_url(ldes_url)
-            context = data.get("@context")
+                        # If we processed all pending pages successfully, we're done
+                        if not self.pending_pages:
+                            self.logger.info("All pending pages processed, harvest complete")
+                            self._save_state()
+                            self.stats["total_duration"] = time.time() - start_time
+                            self.stats["end_time"] = datetime.now().isoformat()
+                            self._print_summary()
+                            return
 
-            # Check if this is the collection entry point or a page
-            if data.get("@type") == "EventStream" or data.get("type") == "EventStream":
-                self.logger.info("Detected EventStream collection entry point")
-                # Extract initial pages from relations
-                initial_urls = self._extract_relations(data)
-                self.logger.info(f"Found {len(initial_urls)} initial pages to process")
+                    # Fetch the collection entry point
+                    data = await self._fetch_url(session, ldes_url)
+                    context = data.get("@context")
 
-                for url in initial_urls:
-                    self._process_page(url, context)
-            else:
-                # Treat as a direct page
-                self.logger.info("Processing as direct LDES page")
-                self._process_page(ldes_url, context)
+                    # Check if this is the collection entry point or a page
+                    if data.get("@type") == "EventStream" or data.get("type") == "EventStream":
+                        self.logger.info("Detected EventStream collection entry point")
+                        # Extract initial pages from relations
+                        initial_urls = self._extract_relations(data)
+                        self.logger.info(f"Found {len(initial_urls)} initial pages to process")
 
-            # Final state save
-            self._save_state()
+                        for url in initial_urls:
+                            self._enqueue(url, context)
+                        await self._crawl(session)
+                    else:
+                        # Treat as a direct page
+                        self.logger.info("Processing as direct LDES page")
+                        self._enqueue(ldes_url, context)
+                        await self._crawl(session)
 
-            # Calculate final statistics
-            self.stats["total_duration"] = time.time() - start_time
-            self.stats["end_time"] = datetime.now().isoformat()
+                    # Final state save
+                    self._save_state()
 
-            # Print summary
-            self._print_summary()
+                    # Calculate final statistics
+                    self.stats["total_duration"] = time.time() - start_time
+                    self.stats["end_time"] = datetime.now().isoformat()
 
-        except Exception as e:
-            self.logger.error(f"Harvesting failed: {e}")
-            self._save_state()
-            raise
+                    # Print summary
+                    self._print_summary()
+
+                except Exception as e:
+                    self.logger.error(f"Harvesting failed: {e}")
+                    self._save_state()
+                    raise
 
     def _print_summary(self):
         """Print harvesting statistics"""
@@ -373,16 +1002,50 @@ def main():
         action="store_true",
         help="Disable resume capability (start fresh)"
     )
+    parser.add_argument(
+        "--nquads",
+        action="store_true",
+        help="Append members to rolling N-Quads log files instead of writing one N-Triples file per member"
+    )
+    parser.add_argument(
+        "--expected-members",
+        type=int,
+        default=1_000_000,
+        help="Expected number of members, used to size the Bloom filter (default: 1000000)"
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=32,
+        help="Number of pages fetched at the same time (default: 32)"
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        help="Number of processes converting members to RDF (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "--write-workers",
+        type=int,
+        default=4,
+        help="Number of pages saved at the same time (default: 4)"
+    )
 
     args = parser.parse_args()
 
     harvester = LDESHarvester(
         cache_dir=args.cache_dir,
-        resume=not args.no_resume
+        resume=not args.no_resume,
+        concurrency=args.fetch_workers,
+        workers=args.parse_workers,
+        write_workers=args.write_workers,
+        expected_members=args.expected_members,
+        nquads=args.nquads
     )
 
     try:
-        harvester.harvest(args.url)
+        run = uvloop.run if uvloop is not None else asyncio.run
+        run(harvester.harvest(args.url))
     except KeyboardInterrupt:
         harvester.logger.info("Harvesting interrupted by user")
         harvester._save_state()
@@ -390,6 +1053,8 @@ def main():
     except Exception as e:
         harvester.logger.error(f"Fatal error: {e}")
         sys.exit(1)
+    finally:
+        harvester.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+"""Check the fast N-Triples writer against pyld's JSON-LD to RDF conversion"""
+import json
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from harvester import _compile_context, _fast_jsonld_to_nt, _member_to_nt  # noqa: E402
+
+CONTEXT = {
+    "ex": "http://example.org/",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+    "name": "ex:name",
+    "count": "ex:count",
+    "flag": "ex:flag",
+    "created": {"@id": "ex:created", "@type": "xsd:dateTime"},
+    "seeAlso": {"@id": "ex:seeAlso", "@type": "@id"},
+    "label": {"@id": "ex:label", "@type": "xsd:string"},
+    "id": "@id",
+    "type": "@type",
+}
+
+FLAT_DOCS = [
+    {"id": "http://example.org/obj1", "type": "ex:Thing", "name": "A \"quoted\"\nname"},
+    {"id": "ex:obj2", "type": ["ex:Thing", "ex:Other"], "count": 42, "flag": True, "ex:raw": False},
+    {"id": "ex:obj3", "created": "2024-01-01T00:00:00Z", "seeAlso": ["ex:obj1", "http://example.org/obj2"]},
+    {"id": "ex:obj4", "name": [{"@value": "naam", "@language": "nl"}, {"@value": "name", "@language": "en-GB"}]},
+    {"id": "ex:obj5", "name": {"@value": "5", "@type": "xsd:integer"}, "ex:link": {"@id": "ex:obj1"}},
+    {"id": "ex:obj6", "label": "plain", "unmapped": "dropped", "name": None},
+]
+
+NOT_FLAT_DOCS = [
+    {"id": "ex:obj7", "label": True},  # Booleans with a datatype are not xsd:boolean
+    {"id": "ex:obj8", "label": 7},
+    {"id": "ex:obj9", "name": 1.5},
+    {"id": "ex:obj10", "name": {"ex:nested": "value"}},
+    {"name": "no subject"},
+]
+
+
+def _lines(nt_data: bytes):
+    return set(nt_data.decode("utf-8").splitlines())
+
+
+class FastWriterTest(unittest.TestCase):
+    def test_flat_documents_match_pyld(self):
+        terms = _compile_context(CONTEXT)
+        for doc in FLAT_DOCS:
+            doc = {"@context": CONTEXT, **doc}
+            with self.subTest(doc=doc["id"]):
+                fast = _fast_jsonld_to_nt(doc, terms)
+                self.assertIsNotNone(fast)
+                self.assertEqual(_lines(fast), _lines(_member_to_nt(json.dumps(doc).encode("utf-8"))))
+
+    def test_other_documents_are_left_to_pyld(self):
+        terms = _compile_context(CONTEXT)
+        for doc in NOT_FLAT_DOCS:
+            with self.subTest(doc=doc):
+                self.assertIsNone(_fast_jsonld_to_nt({"@context": CONTEXT, **doc}, terms))
+
+    def test_unsupported_contexts_are_not_compiled(self):
+        self.assertIsNone(_compile_context({"@vocab": "http://example.org/"}))
+        self.assertIsNone(_compile_context("https://example.org/context.json"))
+        self.assertIsNone(_compile_context({"list": {"@id": "ex:list", "@container": "@list"}}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,294 @@
+"""Harvest a small LDES served by a local aiohttp server"""
+import asyncio
+import hashlib
+import json
+import logging
+import sys
+import tempfile
+import time
+import unittest
+from email.utils import formatdate
+from pathlib import Path
+from unittest import mock
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from harvester import MAX_RETRY_AFTER, LDESHarvester  # noqa: E402
+
+CONTEXT = {"ex": "http://example.org/", "tree": "https://w3id.org/tree#", "id": "@id", "type": "@type",
+           "member": "tree:member", "relation": "tree:relation", "node": {"@id": "tree:node", "@type": "@id"}}
+
+
+def setUpModule():
+    logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+class LDESServer:
+    """Serves JSON-LD pages by path, with ETags, and records the requests"""
+
+    def __init__(self):
+        self.pages = {}
+        self.headers = {}  # Extra response headers per path
+        self.failures = {}  # Per path, (status, headers) responses to send before the page
+        self.requests = []  # (path, status) of every request
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.base = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    def url(self, path: str) -> str:
+        return f"{self.base}/{path}"
+
+    def add_page(self, path: str, members=(), next_paths=(), **extra):
+        self.pages[path] = {
+            "@context": CONTEXT,
+            "id": self.url(path),
+            "member": list(members),
+            "relation": [{"node": self.url(next_path)} for next_path in next_paths],
+            **extra,
+        }
+
+    def add_collection(self, *paths):
+        self.pages["collection"] = {
+            "@context": CONTEXT, "type": "EventStream",
+            "relation": [{"node": self.url(path)} for path in paths],
+        }
+
+    def fetched(self, path: str):
+        return [status for requested, status in self.requests if requested == path]
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        path = request.match_info["path"]
+        if self.failures.get(path):
+            status, headers = self.failures[path].pop(0)
+            self.requests.append((path, status))
+            return web.Response(status=status, headers=headers)
+        if path not in self.pages:
+            self.requests.append((path, 404))
+            return web.Response(status=404)
+        body = json.dumps(self.pages[path]).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            self.requests.append((path, 304))
+            return web.Response(status=304, headers={"ETag": etag})
+        self.requests.append((path, 200))
+        return web.Response(body=body, content_type="application/ld+json", headers={"ETag": etag, **self.headers.get(path, {})})
+
+
+def member(name: str, value: str = "x"):
+    return {"id": f"ex:{name}", "ex:value": value}
+
+
+class HarvesterTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = LDESServer()
+        await self.server.start()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self._tmp.name)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+        self._tmp.cleanup()
+
+    async def harvest(self, path: str, **options) -> LDESHarvester:
+        """Harvest from the test server, recording retry delays in self.delays instead of waiting"""
+        self.delays = []
+        sleep = asyncio.sleep
+
+        async def record_sleep(delay, *args, **kwargs):
+            self.delays.append(delay)
+            await sleep(0)
+
+        harvester = LDESHarvester(cache_dir=str(self.cache_dir), workers=1, **options)
+        try:
+            # The pipeline must stop by itself once every page is done
+            with mock.patch("harvester.asyncio.sleep", record_sleep):
+                await asyncio.wait_for(harvester.harvest(self.server.url(path)), timeout=30)
+        finally:
+            harvester.close()
+        return harvester
+
+    def members_log(self):
+        return (self.cache_dir / "members.log").read_text().splitlines()
+
+
+class DuplicateObjectTest(HarvesterTestCase):
+    async def test_object_on_many_pages_is_saved_once(self):
+        paths = [f"page{i}" for i in range(40)]
+        for i, path in enumerate(paths):
+            self.server.add_page(path, [member("shared", str(i)), member(f"o{i}")])
+        self.server.add_collection(*paths)
+
+        # Slow writes keep saves of the shared object in flight at the same time
+        write_files, append_nquads = LDESHarvester._write_files, LDESHarvester._append_nquads
+
+        def slow_write_files(files):
+            time.sleep(0.01)
+            return write_files(files)
+
+        def slow_append_nquads(harvester, *args):
+            time.sleep(0.01)
+            return append_nquads(harvester, *args)
+
+        for nquads in (False, True):
+            with self.subTest(nquads=nquads), \
+                    mock.patch.object(LDESHarvester, "_write_files", staticmethod(slow_write_files)), \
+                    mock.patch.object(LDESHarvester, "_append_nquads", slow_append_nquads):
+                self.cache_dir = Path(self._tmp.name) / ("nquads" if nquads else "files")
+                harvester = await self.harvest("collection", write_workers=4, nquads=nquads, resume=False)
+
+                self.assertEqual(harvester.stats["members_harvested"], 41)
+                self.assertEqual(self.members_log().count("ex:shared"), 1)
+                if nquads:
+                    log = (self.cache_dir / "harvest-00000.nq").read_text()
+                    self.assertEqual(log.count("<http://example.org/shared> <http://example.org/value>"), 1)
+
+
+
+class PipelineTest(HarvesterTestCase):
+    def add_stream(self):
+        self.server.add_collection("page0")
+        self.server.add_page("page0", [member("o0"), member("o1")], ["page1", "page2"])
+        self.server.add_page("page1", [member("o2")], ["page2"])
+        self.server.add_page("page2", [member("o3")], ["page0"])  # Links back
+
+    async def test_harvest_follows_all_pages_once_and_stops(self):
+        self.add_stream()
+        harvester = await self.harvest("collection")
+
+        self.assertEqual(harvester.stats["members_harvested"], 4)
+        self.assertEqual(harvester.stats["pages_processed"], 3)
+        self.assertEqual(harvester.pending_pages, {})
+        for path in ("page0", "page1", "page2"):
+            self.assertEqual(self.server.fetched(path), [200])
+        for name in ("o0", "o1", "o2", "o3"):
+            self.assertTrue(harvester._member_path(f"ex:{name}").exists())
+
+    async def test_resume_restarts_the_pipeline(self):
+        self.add_stream()
+        self.server.failures["page1"] = [(500, {})] * 3
+        harvester = await self.harvest("collection")
+        self.assertEqual(list(harvester.pending_pages), [self.server.url("page1")])
+
+        # The failed page is resumed first, then the stream is walked from the entry point
+        self.server.add_page("page3", [member("o4")])
+        self.server.add_page("page2", [member("o3")], ["page0", "page3"])
+        harvester = await self.harvest("collection")
+
+        self.assertEqual(harvester.pending_pages, {})
+        self.assertEqual(self.server.fetched("page1")[-1], 200)
+        self.assertEqual(self.server.fetched("page3"), [200])
+        self.assertCountEqual(self.members_log(), ["ex:o0", "ex:o1", "ex:o3", "ex:o2", "ex:o4"])
+
+
+class RevalidationTest(HarvesterTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.server.add_collection("page0")
+
+    async def test_unchanged_pages_are_revalidated_up_to_new_pages(self):
+        self.server.add_page("page0", [member("o0")], ["page1"])
+        self.server.add_page("page1", [member("o1")], ["page2"])
+        self.server.add_page("page2", [member("o2")])
+        await self.harvest("collection")
+
+        # A new page is added after the last one
+        self.server.add_page("page2", [member("o2")], ["page3"])
+        self.server.add_page("page3", [member("o3")])
+        harvester = await self.harvest("collection")
+
+        self.assertEqual(self.server.fetched("page0"), [200, 304])
+        self.assertEqual(self.server.fetched("page1"), [200, 304])
+        self.assertEqual(self.server.fetched("page2"), [200, 200])
+        self.assertEqual(self.server.fetched("page3"), [200])
+        self.assertEqual(harvester.page_next_urls[self.server.url("page2")], [self.server.url("page3")])
+        self.assertEqual(self.members_log(), ["ex:o0", "ex:o1", "ex:o2", "ex:o3"])
+
+    async def test_immutable_pages_are_not_fetched_again(self):
+        self.server.add_page("page0", [member("o0")], ["page1"], immutable=True)
+        self.server.add_page("page1", [member("o1")], ["page2"])
+        self.server.headers["page1"] = {"Cache-Control": "max-age=31536000, immutable"}
+        self.server.add_page("page2", [member("o2")])
+        await self.harvest("collection")
+
+        self.server.add_page("page2", [member("o2")], ["page3"])
+        self.server.add_page("page3", [member("o3")])
+        await self.harvest("collection")
+
+        self.assertEqual(self.server.fetched("page0"), [200])
+        self.assertEqual(self.server.fetched("page1"), [200])
+        self.assertEqual(self.server.fetched("page2"), [200, 200])
+        self.assertEqual(self.server.fetched("page3"), [200])
+
+
+class MembersLogTest(HarvesterTestCase):
+    async def test_processed_members_are_rebuilt_from_the_log(self):
+        self.server.add_collection("page0")
+        self.server.add_page("page0", [member("o0"), member("o1")])
+        await self.harvest("collection")
+
+        harvester = LDESHarvester(cache_dir=str(self.cache_dir))
+        harvester.close()
+        self.assertIn("ex:o0", harvester.processed_members)
+        self.assertIn("ex:o1", harvester.processed_members)
+        self.assertNotIn("ex:o2", harvester.processed_members)
+
+        # A resumed harvest does not save the members again
+        self.server.add_page("page0", [member("o0"), member("o1"), member("o2")])
+        harvester = await self.harvest("collection")
+        self.assertEqual(self.server.fetched("page0"), [200, 200])
+        self.assertEqual(harvester.stats["members_harvested"], 3)
+        self.assertEqual(self.members_log(), ["ex:o0", "ex:o1", "ex:o2"])
+
+    async def test_fresh_harvest_truncates_the_log(self):
+        self.server.add_collection("page0")
+        self.server.add_page("page0", [member("o0")])
+        await self.harvest("collection")
+
+        harvester = LDESHarvester(cache_dir=str(self.cache_dir), resume=False)
+        harvester.close()
+        self.assertEqual(self.members_log(), [])
+        self.assertNotIn("ex:o0", harvester.processed_members)
+
+
+class RetryTest(HarvesterTestCase):
+    async def test_retry_after_is_honored(self):
+        self.server.add_collection("page0")
+        self.server.add_page("page0", [member("o0")])
+        retry_at = formatdate(time.time() + 60, usegmt=True)
+        self.server.failures["page0"] = [(429, {"Retry-After": "120"}), (503, {"Retry-After": retry_at})]
+        harvester = await self.harvest("collection")
+
+        self.assertEqual(self.server.fetched("page0"), [429, 503, 200])
+        self.assertEqual(self.delays[0], 120)
+        self.assertAlmostEqual(self.delays[1], 60, delta=2)
+        self.assertEqual(harvester.stats["members_harvested"], 1)
+        self.assertEqual(harvester.stats["errors"], 0)
+
+    async def test_backoff_is_jittered_and_capped(self):
+        self.server.add_collection("page0")
+        self.server.add_page("page0", [member("o0")])
+        self.server.failures["page0"] = [(500, {"Retry-After": "120"}), (429, {"Retry-After": "3600"})]
+        harvester = await self.harvest("collection")
+
+        self.assertEqual(self.server.fetched("page0"), [500, 429, 200])
+        self.assertTrue(1 <= self.delays[0] < 2)  # Retry-After only applies to 429 and 503
+        self.assertEqual(self.delays[1], MAX_RETRY_AFTER)
+
+
+if __name__ == "__main__":
+    unittest.main()